@@ -1,10 +1,19 @@
 import argparse
+import multiprocessing
+import multiprocessing.util
 import re
+import sys
 from dotenv import load_dotenv
+
+# Load the .env file before importing the scrapers, they read their settings at import time
+load_dotenv()
+
 from scrapers.scrape_for_mealie import scrape_recipe_for_mealie
 from scrapers.scrape_for_tandoor import scrape_recipe_for_tandoor
+from scrapers.manage_browser import close_browser_pools
+from logs import setup_logging
 
-load_dotenv()
+logger = setup_logging("main")
 
 
 def is_valid_url(url, platform):
@@ -23,6 +32,42 @@ def is_valid_url(url, platform):
             url_pattern = re.compile(r'^(https?:\/\/)?(www\.)?tiktok\.com\/@?[A-Za-z0-9_\-\/]+\/video\/[0-9]+(\?.*)?$')
             
     return re.match(url_pattern, url) is not None
+
+def scrape_one(url, mode, platform):
+    """
+    Scrape a single post with the given mode. Runs in its own process when several URLs are
+    processed in parallel, so every worker owns its own browser.
+    Args:
+        url (str): The URL of the post.
+        mode (str): The mode of the recipe extraction ('mealie'/'m' or 'tandoor'/'t').
+        platform (str): The platform of the URL ('instagram'/'i' or 'tiktok'/'t').
+    Returns:
+        dict: Result of the Mealie / Tandoor upload.
+    """
+    if mode == 'mealie' or mode == 'm':
+        return scrape_recipe_for_mealie(url, platform)
+    return scrape_recipe_for_tandoor(url, platform)
+
+def _init_worker():
+    """Close the pooled browsers when a worker exits, pool workers don't run atexit handlers."""
+    multiprocessing.util.Finalize(None, close_browser_pools, exitpriority=10)
+
+def _scrape_one_safe(args):
+    """Pool wrapper around scrape_one, a failing URL must not stop the other workers."""
+    try:
+        return args[0], scrape_one(*args)
+    except Exception as e:
+        return args[0], {"status": "error", "error": str(e)}
+
+def _failed(result):
+    """
+    True if a scrape result is an error. Tandoor results carry the upload status, Mealie
+    results wrap the upload result in 'result'.
+    """
+    if not isinstance(result, dict) or result.get("status") == "error":
+        return True
+    upload = result.get("result")
+    return isinstance(upload, dict) and upload.get("status") == "error"
     
 def main():
     """
@@ -30,27 +75,54 @@ def main():
     This function uses argparse to parse command-line arguments for the URL of the Instagram post
     and the mode of recipe extraction (either 'mealie' or 'tandoor'). It validates the provided
     Instagram URL and calls the appropriate scraping function based on the specified mode.
+    Several URLs can be given, they are processed by up to -workers browser processes in parallel.
+    Exits with status 1 if any of the posts failed.
     Raises:
         ValueError: If the provided Instagram URL is invalid or if the mode is not 'mealie'/'m' or 'tandoor'/'t'.
     Command-line Arguments:
-        -url (str): The URL of the Instagram post.
+        -url (str): The URL(s) of the Instagram post(s).
         -mode (str): The mode of the recipe extraction ('mealie'/'m' or 'tandoor'/'t').
+        -workers (int): Number of posts to process in parallel (default 1).
     """
     parser = argparse.ArgumentParser(description='Extract recipe information from an post')
-    parser.add_argument('-url', type=str, required=True, help='The URL of the Instagram post')
+    parser.add_argument('-url', type=str, nargs='+', required=True, help='The URL(s) of the Instagram post(s)')
     parser.add_argument('-mode', type=str, required=True, help='The mode of the recipe extraction (mealie or tandoor)')
     parser.add_argument('-platform', type=str, required=True, help='The platform of the URL (instagram or tiktok)')
+    parser.add_argument('-workers', type=int, default=1, help='Number of posts to process in parallel (one browser each)')
     args = parser.parse_args()
     
-    if not is_valid_url(args.url, args.platform):
-        raise ValueError("Invalid URL. Please provide a valid post URL.")
+    for url in args.url:
+        if not is_valid_url(url, args.platform):
+            raise ValueError(f"Invalid URL {url}. Please provide a valid post URL.")
     
-    if args.mode == 'mealie' or args.mode == 'm':
-        scrape_recipe_for_mealie(args.url, args.platform)
-    elif args.mode == 'tandoor' or args.mode == 't':
-        scrape_recipe_for_tandoor(args.url, args.platform)
-    else:
+    if args.mode not in ('mealie', 'm', 'tandoor', 't'):
         raise ValueError("Invalid mode. Please specify either 'mealie'/'m' or 'tandoor'/'t'")
+    
+    workers = min(max(1, args.workers), len(args.url))
+    jobs = [(url, args.mode, args.platform) for url in args.url]
+    failed = []
+    
+    def _report(url, result):
+        if _failed(result):
+            logger.error(f"{url}: {result}")
+            failed.append(url)
+        else:
+            logger.info(f"{url}: {result}")
+    
+    if workers == 1:
+        for job in jobs:
+            _report(*_scrape_one_safe(job))
+    else:
+        with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+            for url, result in pool.imap_unordered(_scrape_one_safe, jobs):
+                _report(url, result)
+            # Let the workers exit on their own so they close their browsers
+            pool.close()
+            pool.join()
+    
+    if failed:
+        logger.error(f"{len(failed)} of {len(args.url)} posts failed: {', '.join(failed)}")
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,37 +1,337 @@
+import hashlib
+import itertools
 import json
 import os
+import queue
 import re
 import time
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from html import unescape
+from pathlib import Path
 from logs import setup_logging
+from scrapers.manage_browser import _wait
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
+
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
 
 logger = setup_logging("duck_ai")
 
+_DIGITS_RE = re.compile(r"\d+")
+# Fenced code block in the text of an answer, e.g. when it isn't rendered as a JSON block
+_BACKTICK_RE = re.compile(r"```(?:json)?\s*\n?([\s\S]*?)```", re.IGNORECASE)
+
+# Language of the AI responses; read once since it doesn't change at runtime
+_LANG = os.getenv("LANGUAGE_CODE", "en")
+_BACKTICKS = "```"
+
+# Selectors of the Duck.ai chat elements
+_TEXTAREA_SELECTORS = ("textarea[name='user-prompt']", "textarea")
+_SUBMIT_SELECTOR = "button[type='submit']"
+_JSON_BLOCK_CLASS = "language-json"
+_MESSAGE_CLASS = "VrBPSncUavA1d7C9kAc5"
+_JSON_BLOCK = ("code", {"class": _JSON_BLOCK_CLASS})
+_MESSAGE_DIV = ("div", {"class": _MESSAGE_CLASS})
+# The same elements as CSS selectors, passed to the page scripts
+_PAGE_SELECTORS = {
+    "json": f"code.{_JSON_BLOCK_CLASS}",
+    "code": "pre code",
+    "message": f"div.{_MESSAGE_CLASS}",
+}
+# <code class="language-json"> elements in page_source, parsed without BeautifulSoup if possible
+_JSON_CODE_RE = re.compile(
+    r'<code[^>]*class="[^"]*' + re.escape(_JSON_BLOCK_CLASS) + r'[^"]*"[^>]*>([\s\S]*?)</code>'
+)
+
+# Prompt templates per recipe part, filled with lang, part, step, steps and bt (the code fence)
+_PROMPT_TEMPLATES = {
+    "step": (
+        "Write your Response in the language {lang}. "
+        "Please fill the JSON document {part}. "
+        "Only step {step}. Return enclosed in ({bt}json)."
+    ),
+    "info": (
+        "Write your Response in {lang}. "
+        "Fill author, description, recipeYield, prepTime, and cookTime in {part}. "
+        "Use ISO 8601 duration format. Return enclosed in ({bt}json)."
+    ),
+    "ingredients": (
+        "Write your Response in {lang}. "
+        "Append all clearly mentioned ingredients to 'recipeIngredient' in {part}. "
+        "Return enclosed in ({bt}json)."
+    ),
+    "name": (
+        "Respond in {lang}. "
+        "Provide a concise title for this recipe in {part}. "
+        "Return enclosed in ({bt}json)."
+    ),
+    "nutrition": (
+        "Respond in {lang}. "
+        "Fill calories and fatContent as strings in {part}. "
+        "Return enclosed in ({bt}json)."
+    ),
+    "instructions": (
+        "Write your Response in {lang}. "
+        "Complete JSON fragment {part}. "
+        "Return enclosed in ({bt}json)."
+    ),
+    "all": (
+        "Write your Response in {lang}. "
+        "Fill the complete JSON document {part}: a concise 'name', author, description, "
+        "recipeYield, prepTime and cookTime (ISO 8601 duration format), all clearly mentioned "
+        "ingredients in 'recipeIngredient', the instructions in 'recipeInstructions' and "
+        "calories and fatContent as strings in 'nutrition'. "
+        "Return enclosed in ({bt}json)."
+    ),
+    "batch": (
+        "Write your Response in the language {lang}. "
+        "Please fill the complete JSON document {part}. "
+        "The recipe has {steps} steps: 'steps' must contain exactly {steps} entries "
+        "in the format of the given step, in order. "
+        "Return the whole document enclosed in ({bt}json)."
+    ),
+}
+_DEFAULT_PROMPT_TEMPLATE = "Write your Response in {lang}. Fill JSON {part}. Return enclosed in ({bt}json)."
+
+# Debug artifacts are written in the background, one file at a time
+_DEBUG_ARTIFACTS = bool(os.getenv("DUCK_AI_DEBUG"))
+_artifact_executor = ThreadPoolExecutor(max_workers=1)
+_artifact_seq = itertools.count()
+
+# Optional disk cache for parsed JSON answers, keyed by recipe caption and prompt
+_CACHE_DIR = os.getenv("DUCK_AI_CACHE_DIR")
+_CACHE_TTL = int(os.getenv("DUCK_AI_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Bounds of the answer timeout, which adapts to the observed answer times of each chat
+_RESPONSE_TIMEOUT = 60
+_MIN_RESPONSE_TIMEOUT = 15
+
+# Returns the text of the last JSON code block (or of the last untagged code block if there
+# is none), of the last response paragraph and of the whole last response. Only blocks and
+# responses added since the last submit in the chat of the textarea (arguments[0]) count,
+# so an answer without a code block doesn't return the one of the previous answer. The
+# elements are found with the _PAGE_SELECTORS in arguments[1].
+_RESPONSE_JS = """
+const s = arguments[1];
+const w = (arguments[0] && arguments[0].getRootNode().__duckWatch) || {};
+const seen = {blocks: w.jsonBlocks || 0, messages: w.messages || 0};
+let blocks = Array.from(document.querySelectorAll(s.json)).slice(seen.blocks);
+if (!blocks.length) blocks = Array.from(document.querySelectorAll(s.code)).slice(w.codeBlocks || 0);
+const messages = Array.from(document.querySelectorAll(s.message)).slice(seen.messages);
+const message = messages.length ? messages[messages.length - 1] : null;
+const paragraph = message ? message.querySelector('p') : null;
+return {
+    json: blocks.length ? blocks[blocks.length - 1].textContent : null,
+    text: paragraph ? paragraph.innerText : null,
+    message: message ? message.innerText : null,
+    seen: seen
+};
+"""
+
+# Returns the first visible element matching one of the selectors in arguments[0] (tried in
+# order), searching the document and all (nested) shadow roots
+_DEEP_QUERY_JS = """
+function deepQuery(selector, root) {
+    for (const el of root.querySelectorAll(selector)) {
+        if (el.offsetParent !== null) return el;
+    }
+    for (const el of root.querySelectorAll('*')) {
+        if (el.shadowRoot) {
+            const found = deepQuery(selector, el.shadowRoot);
+            if (found) return found;
+        }
+    }
+    return null;
+}
+for (const selector of arguments[0]) {
+    const found = deepQuery(selector, document);
+    if (found) return found;
+}
+return null;
+"""
+
+# Describes the elements in arguments[0] for the debug artifacts, in a single roundtrip
+_DESCRIBE_ELEMENTS_JS = """
+return Array.from(arguments[0]).map((el, index) => {
+    const style = getComputedStyle(el);
+    return {
+        index: index,
+        tag: el.tagName.toLowerCase(),
+        id: el.id || '',
+        name: el.getAttribute('name') || '',
+        classes: el.getAttribute('class') || '',
+        placeholder: el.getAttribute('placeholder') || '',
+        visible: el.offsetWidth > 0 && el.offsetHeight > 0
+            && style.visibility !== 'hidden' && style.display !== 'none'
+    };
+});
+"""
+
+# Installs (once per chat root) a MutationObserver counting finished answers: the submit
+# button (found via selector, so re-rendered buttons are fine) is disabled or missing while
+# an answer streams, and every transition back to enabled increments done.
+_WATCH_JS = """
+function duckWatch(root, selector) {
+    if (root.__duckWatch) return root.__duckWatch;
+    const isBusy = () => {
+        const button = root.querySelector(selector);
+        return !button || button.disabled;
+    };
+    const w = root.__duckWatch = {done: 0, busy: isBusy()};
+    w.sync = () => {
+        const busy = isBusy();
+        if (w.busy && !busy) w.done++;
+        w.busy = busy;
+    };
+    new MutationObserver(w.sync).observe(root, {
+        subtree: true, childList: true, attributes: true, attributeFilter: ['disabled']
+    });
+    return w;
+}
+"""
+
+# Fills the textarea (arguments[0]) with arguments[1] and submits it via Enter and the submit
+# button (arguments[2]). Returns the number of finished answers before the submit and
+# remembers the number of code blocks and responses in the page (found with the
+# _PAGE_SELECTORS in arguments[4]), so the wait and _RESPONSE_JS can tell the new ones apart.
+_FILL_AND_SUBMIT_JS = _WATCH_JS + """
+const t = arguments[0];
+const b = arguments[2];
+const s = arguments[4];
+const w = duckWatch(t.getRootNode(), arguments[3]);
+t.scrollIntoView({block: 'center'});
+t.focus();
+t.value = '';
+t.value = arguments[1];
+t.dispatchEvent(new Event('input', {bubbles: true, composed: true}));
+w.sync();
+const before = w.done;
+w.jsonBlocks = document.querySelectorAll(s.json).length;
+w.codeBlocks = document.querySelectorAll(s.code).length;
+w.messages = document.querySelectorAll(s.message).length;
+t.dispatchEvent(new KeyboardEvent('keydown',
+    {key: 'Enter', code: 'Enter', keyCode: 13, which: 13, bubbles: true, composed: true}));
+if (b) b.click();
+return before;
+"""
+
+# Resolves true once more than arguments[1] answers finished in the chat of the element in
+# arguments[0], or (with arguments[1] null) once no answer is streaming. A new JSON block
+# that already parses also counts as finished, the rest of the answer isn't needed. Gives
+# up waiting for the answer to start after arguments[2] ms (resolving null) and for it to
+# end after arguments[3] ms (resolving false). arguments[4] is the submit button selector,
+# arguments[5] the _PAGE_SELECTORS.
+_WAIT_FOR_RESPONSE_JS = _WATCH_JS + """
+const target = arguments[1];
+const startTimeout = arguments[2];
+const timeout = arguments[3];
+const s = arguments[5];
+const done = arguments[arguments.length - 1];
+const w = duckWatch(arguments[0].getRootNode(), arguments[4]);
+w.sync();
+const jsonDone = () => {
+    const blocks = document.querySelectorAll(s.json);
+    if (blocks.length <= (w.jsonBlocks || 0)) return false;
+    // Only parse once the block may be complete, not on every streamed token
+    const text = blocks[blocks.length - 1].textContent.trim();
+    if (!text.endsWith('}')) return false;
+    try {
+        const data = JSON.parse(text);
+        return data !== null && typeof data === 'object';
+    } catch (e) {
+        return false;
+    }
+};
+const finished = () => target === null ? !w.busy : w.done > target || jsonDone();
+if (finished()) return done(true);
+const observer = new MutationObserver(() => { if (finished()) finish(true); });
+const timers = [
+    setTimeout(() => { if (!w.busy && w.done <= target) finish(null); }, startTimeout),
+    setTimeout(() => finish(false), timeout)
+];
+function finish(result) {
+    observer.disconnect();
+    timers.forEach(clearTimeout);
+    done(result);
+}
+observer.observe(arguments[0].getRootNode(), {
+    subtree: true, childList: true, attributes: true, attributeFilter: ['disabled']
+});
+"""
+
+
+def _debug_artifacts_enabled():
+    """Debug files are only written with DUCK_AI_DEBUG set (the Docker image logs at DEBUG)."""
+    return _DEBUG_ARTIFACTS
+
+
+def _artifact_tag():
+    """Unique suffix for debug file names, so artifacts saved in the same second don't collide."""
+    return f"{next(_artifact_seq)}_{os.getpid()}"
+
 
-def _save_debug_artifacts(browser, prefix):
+def _write_debug_file(fname, content):
+    """Write a debug artifact to disk in a single write (runs on the artifact thread)."""
+    try:
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        Path(fname).write_bytes(content)
+        logger.info(f"Wrote debug artifact to {fname}")
+    except Exception as e:
+        logger.debug(f"Failed to write debug artifact {fname}: {e}")
+
+
+def _dumps(data, indent=False):
+    """Serialize data to a JSON string, with orjson if it is installed."""
+    if _json is json:
+        return json.dumps(data, ensure_ascii=False, indent=2 if indent else None)
+    return _json.dumps(data, option=_json.OPT_INDENT_2 if indent else None).decode("utf-8")
+
+
+def _write_debug_json(fname, data):
+    """Serialize and write a debug artifact as JSON (runs on the artifact thread)."""
+    _write_debug_file(fname, _dumps(data))
+
+
+def save_debug_json(fname, data):
+    """
+    Save data as JSON for debugging if debug artifacts are enabled (see _debug_artifacts_enabled).
+    The data is serialized right away, the file is written on the artifact thread.
+    """
+    if not _debug_artifacts_enabled():
+        return
+    _artifact_executor.submit(_write_debug_file, fname, _dumps(data, indent=True))
+
+
+def _save_debug_artifacts(browser, prefix, screenshot=True):
     """Save page_source, a screenshot and browser console logs for offline inspection.
 
+    Only runs when debug artifacts are enabled (see _debug_artifacts_enabled). Only the
+    driver calls happen on the calling thread; encoding and writing the files is handed
+    to a background thread so error branches don't block on disk I/O.
     Best-effort helper: any failure is ignored so this never raises during normal runs.
     """
-    ts = int(time.time())
+    if not _debug_artifacts_enabled():
+        return
+    tag = _artifact_tag()
     try:
         src = browser.page_source
-        fname = f"./scrapers/{prefix}_page_{ts}.html"
-        with open(fname, "w", encoding="utf-8") as f:
-            f.write(src)
-        logger.info(f"Wrote debug page_source to {fname}")
-    except Exception as e:
-        logger.debug(f"Failed to write debug page_source: {e}")
-    try:
-        screenshot = f"./scrapers/{prefix}_screenshot_{ts}.png"
-        browser.save_screenshot(screenshot)
-        logger.info(f"Wrote debug screenshot to {screenshot}")
+        _artifact_executor.submit(_write_debug_file, f"./scrapers/{prefix}_page_{tag}.html", src)
     except Exception as e:
-        logger.debug(f"Failed to write screenshot: {e}")
+        logger.debug(f"Failed to save debug page_source: {e}")
+    if screenshot:
+        try:
+            png = browser.get_screenshot_as_png()
+            _artifact_executor.submit(_write_debug_file, f"./scrapers/{prefix}_screenshot_{tag}.png", png)
+        except Exception as e:
+            logger.debug(f"Failed to save screenshot: {e}")
     try:
         # browser.get_log may not be supported in all environments; try best-effort
         logs = []
@@ -44,109 +344,272 @@ def _save_debug_artifacts(browser, prefix):
             except Exception:
                 logs = []
         if logs:
-            logfile = f"./scrapers/{prefix}_console_{ts}.json"
-            with open(logfile, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, indent=2, ensure_ascii=False)
-            logger.info(f"Wrote browser console logs to {logfile}")
+            _artifact_executor.submit(_write_debug_json, f"./scrapers/{prefix}_console_{tag}.json", logs)
     except Exception as e:
         logger.debug(f"Failed to save console logs: {e}")
 
 
+def _cache_file(session, prompt):
+    """Return the cache file for a prompt in the session's recipe chat, None if caching is off."""
+    if not _CACHE_DIR or session.context is None:
+        return None
+    key = hashlib.blake2b(digest_size=16)
+    key.update(session.context.encode("utf-8"))
+    key.update(b"\0")
+    key.update(prompt.encode("utf-8"))
+    return Path(_CACHE_DIR) / f"{key.hexdigest()}.json"
 
-def initialize_chat(browser, caption):
+
+def _load_cached(cache_file):
+    try:
+        if cache_file and time.time() - cache_file.stat().st_mtime < _CACHE_TTL:
+            return _json.loads(cache_file.read_bytes())
+    except Exception:
+        pass
+    return None
+
+
+def _lookup_cached(session, prompt):
+    """Return the cache file for a prompt and its cached answer (None if not cached)."""
+    cache_file = _cache_file(session, prompt)
+    data = _load_cached(cache_file)
+    if data is not None:
+        logger.info(f"Using cached response from {cache_file}")
+    return cache_file, data
+
+
+def _store_cached(cache_file, data):
+    if cache_file is None:
+        return
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(_dumps(data).encode("utf-8"))
+    except Exception as e:
+        logger.debug(f"Failed to cache response in {cache_file}: {e}")
+
+
+class DuckChatSession:
     """
-    Initialize a chat with Duck.ai by providing the recipe caption as context.
-    Compatible with Duck.ai light DOM structure (Oct 2025).
+    Cached handles to the Duck.ai chat input of one browser.
+
+    Resolving the prompt textarea (light DOM and shadow roots) costs WebDriver
+    roundtrips, so the elements are looked up once per chat and only resolved
+    again when they went stale.
     """
-    logger.info("Initializing chat with recipe context...")
 
-    try:
-        # Versuche primär duck-chat im Shadow DOM
+    def __init__(self, browser):
+        self.browser = browser
+        self.textarea = None
+        self.submit_button = None
+        self.script_timeout = None
+        # Finished answers in the chat before the last prompt was submitted
+        self.answers = 0
+        # Recipe caption the chat was initialized with (used as cache key)
+        self.context = None
+        # Time of the last submit and moving average of the answer times, in seconds
+        self.submitted_at = None
+        self.latency = None
+
+    def response_timeout(self):
+        """
+        Seconds to wait for an answer: three times the average time of the JSON answers so
+        far, within bounds. Short answers (context, number of steps) aren't timed, so they
+        don't cut off the long JSON answers after them.
+        """
+        if self.latency is None:
+            return _RESPONSE_TIMEOUT
+        return min(_RESPONSE_TIMEOUT, max(_MIN_RESPONSE_TIMEOUT, round(3 * self.latency)))
+
+    def record_latency(self):
+        """Add the time since the last submit to the moving average of answer times."""
+        if self.submitted_at is None:
+            return
+        elapsed = time.monotonic() - self.submitted_at
+        self.latency = elapsed if self.latency is None else 0.7 * self.latency + 0.3 * elapsed
+
+    def get_textarea(self, wait=0):
+        """Return the chat textarea, re-resolving it only if the cached one is gone."""
+        if self.textarea is not None:
+            try:
+                if self.textarea.is_displayed():
+                    return self.textarea
+            except StaleElementReferenceException:
+                logger.info("Cached chat textarea went stale, resolving again")
+            self.submit_button = None
+
+        self.textarea = self._find_textarea(wait)
+        return self.textarea
+
+    def get_submit_button(self):
+        """Return the submit button of the chat form, or None if there is none."""
+        if self.submit_button is not None:
+            try:
+                self.submit_button.is_enabled()
+                return self.submit_button
+            except StaleElementReferenceException:
+                self.submit_button = None
+
         try:
-            host = WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "duck-chat"))
+            self.submit_button = self._deep_query(_SUBMIT_SELECTOR)
+        except Exception:
+            self.submit_button = None
+
+        return self.submit_button
+
+    def _deep_query(self, *selectors, wait=0):
+        """Find the first visible element for the selectors, piercing shadow roots, in one script call.
+
+        Selectors are tried in order, so the most specific one should come first.
+        """
+        if not wait:
+            return self.browser.execute_script(_DEEP_QUERY_JS, selectors)
+        try:
+            return _wait(self.browser, wait).until(
+                lambda d: d.execute_script(_DEEP_QUERY_JS, selectors)
             )
-            shadow_root = browser.execute_script("return arguments[0].shadowRoot;", host)
-            textarea = browser.execute_script(
-                "return arguments[0].querySelector('textarea[name=\"user-prompt\"]');",
-                shadow_root
+        except TimeoutException:
+            return None
+
+    def _find_textarea(self, wait):
+        browser = self.browser
+
+        # Sichtbare Textarea suchen, auch innerhalb von Shadow Roots (duck-chat)
+        textarea = self._deep_query(*_TEXTAREA_SELECTORS, wait=wait)
+        if textarea:
+            return textarea
+
+        logger.error("No visible textarea candidate for chat input")
+
+        candidates = browser.find_elements(By.CSS_SELECTOR, _TEXTAREA_SELECTORS[-1])
+
+        # Debug: Speichere Kandidaten-Info
+        if _debug_artifacts_enabled():
+            try:
+                debug_data = browser.execute_script(_DESCRIBE_ELEMENTS_JS, candidates)
+            except Exception as e:
+                debug_data = [{"error": str(e)}]
+
+            _artifact_executor.submit(
+                _write_debug_json, f"./scrapers/debug_candidates_{_artifact_tag()}.json", debug_data
             )
-            if textarea:
-                logger.info("Found textarea in shadow DOM")
+
+        # Letzter Fallback: Nimm erste Textarea auch wenn nicht visible
+        if candidates:
+            logger.info("Attempting forced input set on first textarea (may not be visible)")
+            return candidates[0]
+
+        try:
+            _save_debug_artifacts(browser, 'no_visible_candidates')
         except Exception:
-            logger.info("Primary duck-chat host not found, trying fallback selectors")
-            # save artifacts for debugging why host not found
-            try:
-                _save_debug_artifacts(browser, 'init_no_duckchat')
-            except Exception:
-                pass
-            textarea = None
+            pass
+        return None
 
-        # Fallback: Suche nach Textarea im normalen DOM
-        if not textarea:
-            candidates = browser.find_elements(By.CSS_SELECTOR, "textarea")
-            logger.info(f"Found {len(candidates)} candidate textareas in light DOM")
-            
-            visible_candidates = []
-            for idx, elem in enumerate(candidates):
-                try:
-                    if elem.is_displayed():
-                        visible_candidates.append(elem)
-                except:
-                    pass
-            
-            logger.info(f"Filtered to {len(visible_candidates)} visible candidate textareas")
-            
-            if not visible_candidates:
-                # debug artifacts
-                try:
-                    _save_debug_artifacts(browser, 'init_no_visible_input')
-                except Exception:
-                    pass
-                raise Exception("No visible textarea found for chat input")
-            
-            textarea = visible_candidates[0]
 
-        # Text eingeben
-        browser.execute_script("arguments[0].scrollIntoView({block:'center'});", textarea)
-        browser.execute_script("arguments[0].focus();", textarea)
-        time.sleep(0.5)
+def _get_session(browser):
+    """Return the DuckChatSession attached to the browser, creating it on first use."""
+    session = getattr(browser, "_duck_session", None)
+    if session is None:
+        session = DuckChatSession(browser)
+        browser._duck_session = session
+    return session
 
-        context_prompt = (
-            f"I'm going to ask you questions about this recipe. "
-            f"Please use this recipe information as context for all your responses: {caption}"
-        )
 
-        browser.execute_script(
-            "arguments[0].value = arguments[1]; "
-            "arguments[0].dispatchEvent(new Event('input', {bubbles:true, composed:true}));",
+def _wait_for_response(session, timeout=None, start_timeout=5, idle_only=False):
+    """Block until Duck.ai has finished answering the last prompt.
+
+    The submit button is disabled while a response is streaming. A MutationObserver in
+    the page counts every answer that finished since the chat was first used, so the wait
+    is a single WebDriver call that also returns at once if the answer already finished
+    (e.g. in a background tab). If the answer hasn't started after start_timeout seconds
+    the wait gives up. The wait also ends as soon as the answer contains a complete
+    JSON block, the text streamed after it is finished by the idle wait before the next
+    prompt. With idle_only this only waits for an answer that is still streaming. Without a
+    timeout the session's adaptive response_timeout is used; after a timeout it starts
+    over from the full _RESPONSE_TIMEOUT.
+
+    Returns:
+        bool: True if the answer finished, False if it didn't start or finish in time or if
+        the wait failed.
+    """
+    textarea = session.get_textarea()
+    if textarea is None:
+        logger.warning("Textarea not found, cannot wait for the response")
+        return False
+
+    browser = session.browser
+    if timeout is None:
+        timeout = session.response_timeout()
+    try:
+        if (session.script_timeout or 0) < timeout:
+            browser.set_script_timeout(timeout + 5)
+            session.script_timeout = timeout
+        finished = browser.execute_async_script(
+            _WAIT_FOR_RESPONSE_JS,
             textarea,
-            context_prompt
+            None if idle_only else session.answers,
+            start_timeout * 1000,
+            timeout * 1000,
+            _SUBMIT_SELECTOR,
+            _PAGE_SELECTORS,
         )
-        
-        time.sleep(0.5)
-        
-        # Submit via Enter oder Button
-        try:
-            browser.execute_script(
-                "arguments[0].dispatchEvent(new KeyboardEvent('keydown', "
-                "{key:'Enter', code:'Enter', keyCode:13, which:13, bubbles:true, composed:true}));",
-                textarea
-            )
-        except:
-            pass
+        if finished is None:
+            logger.warning(f"Duck.ai did not start answering within {start_timeout}s")
+            return False
+        if not finished:
+            logger.warning(f"Duck.ai did not finish answering within {timeout}s")
+            if not idle_only:
+                # Zu kurz geschätzt, die nächste Antwort bekommt wieder die volle Zeit
+                session.latency = None
+            return False
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to wait for Duck.ai response: {e}")
+        return False
 
-        # Fallback: Submit-Button
-        try:
-            submit = browser.find_element(By.CSS_SELECTOR, "button[type='submit']")
-            browser.execute_script("arguments[0].click();", submit)
-        except:
-            pass
 
+def _fill_and_submit(session, textarea, text):
+    """Type text into the chat textarea and submit it (Enter, then button as fallback).
+
+    Everything happens in a single script so a prompt costs one WebDriver roundtrip. The
+    script also returns the number of answers finished so far, which _wait_for_response
+    waits to increase.
+    """
+    session.answers = session.browser.execute_script(
+        _FILL_AND_SUBMIT_JS, textarea, text, session.get_submit_button(), _SUBMIT_SELECTOR,
+        _PAGE_SELECTORS,
+    )
+    session.submitted_at = time.monotonic()
+
+
+def _context_prompt(caption):
+    return (
+        f"I'm going to ask you questions about this recipe. "
+        f"Please use this recipe information as context for all your responses: {caption}"
+    )
+
+
+def initialize_chat(browser, caption):
+    """
+    Initialize a chat with Duck.ai by providing the recipe caption as context.
+    Compatible with Duck.ai light DOM structure (Oct 2025).
+
+    Starts a fresh DuckChatSession for the browser; later prompts reuse its cached elements.
+    """
+    logger.info("Initializing chat with recipe context...")
+
+    try:
+        session = DuckChatSession(browser)
+        session.context = caption
+        browser._duck_session = session
+
+        if session.get_textarea(wait=10) is None:
+            raise Exception("No textarea found for chat input")
+
+        if not _submit_prompt(session, _context_prompt(caption)):
+            raise Exception("Failed to submit recipe context")
         logger.info("Prompt filled successfully (shadow or light DOM)")
         
-        # Warte auf Antwort - längere Zeit
-        time.sleep(5)
+        _wait_for_response(session)
         
         logger.info("Chat initialized successfully with recipe context")
         return True
@@ -158,159 +621,207 @@ def initialize_chat(browser, caption):
 
 def send_raw_prompt(browser, prompt):
     """
-    Send a prompt to Duck.ai and get the raw HTML response.
+    Send a prompt to Duck.ai and get the response.
+
+    Only the parts of the page we parse are transferred from the browser: the text of
+    the last JSON code block and of the last response paragraph. The full page source
+    is only fetched if neither could be found.
+
+    Returns:
+        DuckResponse or None: The answer, or None if the prompt could not be sent or the
+        answer didn't finish in time.
     """
     logger.info(f"Sending raw prompt: {prompt[:80]}...")
     
     try:
-        # Warte kurz vor jedem neuen Prompt
-        time.sleep(2)
-        
-        # Versuche primär Shadow DOM
-        textarea = None
-        try:
-            host = browser.find_element(By.CSS_SELECTOR, "duck-chat")
-            shadow_root = browser.execute_script("return arguments[0].shadowRoot;", host)
-            textarea = browser.execute_script(
-                "return arguments[0].querySelector('textarea[name=\"user-prompt\"]');",
-                shadow_root
-            )
-        except Exception:
-            logger.info("duck-chat host not found in send_raw_prompt, will try light DOM selectors")
-            try:
-                _save_debug_artifacts(browser, 'send_no_duckchat')
-            except Exception:
-                pass
+        session = _get_session(browser)
+        if not _submit_prompt(session, prompt):
+            return None
 
-        # Fallback: Light DOM - NUR Textareas (nicht input!)
-        if not textarea:
-            candidates = browser.find_elements(By.CSS_SELECTOR, "textarea")
-            logger.info(f"send_raw_prompt found {len(candidates)} textareas in light DOM")
-            
-            # Debug: Speichere Kandidaten-Info
-            debug_data = []
-            for idx, elem in enumerate(candidates):
-                try:
-                    is_visible = elem.is_displayed()
-                    debug_data.append({
-                        "index": idx,
-                        "tag": elem.tag_name,
-                        "id": elem.get_attribute("id") or "",
-                        "name": elem.get_attribute("name") or "",
-                        "classes": elem.get_attribute("class") or "",
-                        "placeholder": elem.get_attribute("placeholder") or "",
-                        "visible": is_visible
-                    })
-                except:
-                    pass
-            
-            # Wähle sichtbare Textarea
-            visible = [c for c in candidates if c.is_displayed()]
-            
-            if not visible:
-                # Debug-Ausgabe
-                import time as t
-                debug_file = f"./scrapers/debug_candidates_{int(t.time())}.json"
-                with open(debug_file, "w") as f:
-                    json.dump(debug_data, f, indent=2)
-                logger.info(f"Wrote textarea candidate diagnostics to {debug_file}")
-                
-                logger.error("No visible textarea candidate in send_raw_prompt")
-                
-                # Letzter Fallback: Nimm erste Textarea auch wenn nicht visible
-                if candidates:
-                    textarea = candidates[0]
-                    logger.info("Attempting forced input set on first textarea (may not be visible)")
-                else:
-                    try:
-                        _save_debug_artifacts(browser, 'send_no_visible_candidates')
-                    except Exception:
-                        pass
-                    return None
-            else:
-                textarea = visible[0]
+        response = _read_response(session)
+        if response is None:
+            logger.warning("No complete response retrieved from Duck.ai")
+            return None
+        logger.info("Prompt sent and response retrieved successfully")
+        return response
 
-        # Text eingeben
-        browser.execute_script("arguments[0].scrollIntoView({block:'center'});", textarea)
-        browser.execute_script("arguments[0].focus();", textarea)
-        time.sleep(0.3)
-        
-        browser.execute_script("arguments[0].value = '';", textarea)
-        time.sleep(0.3)
+    except Exception as e:
+        logger.error(f"Failed to send prompt: {e}", exc_info=True)
+        return None
 
-        browser.execute_script(
-            "arguments[0].value = arguments[1]; "
-            "arguments[0].dispatchEvent(new Event('input', {bubbles:true, composed:true}));",
-            textarea,
-            prompt
+
+def _submit_prompt(session, prompt):
+    """Submit a prompt to the session's chat without waiting for the answer."""
+    textarea = session.get_textarea()
+    if textarea is None:
+        logger.error("No textarea found in send_raw_prompt")
+        return False
+
+    # Warte bis eine noch laufende Antwort fertig und die Textarea bedienbar ist
+    _wait_for_response(session, timeout=30, idle_only=True)
+    _wait(session.browser, 10).until(EC.element_to_be_clickable(textarea))
+
+    _fill_and_submit(session, textarea, prompt)
+    return True
+
+
+def _read_response(session):
+    """Wait for the answer to the last submitted prompt and return it (see send_raw_prompt)."""
+    browser = session.browser
+    if not _wait_for_response(session):
+        # Eine halb gestreamte Antwort wird nicht geparst (und damit nicht gecacht)
+        return None
+
+    response = browser.execute_script(_RESPONSE_JS, session.textarea, _PAGE_SELECTORS)
+    if response and response.get("json"):
+        # Nur JSON-Antworten zählen für das adaptive Timeout
+        session.record_latency()
+    if not response or not (response.get("json") or response.get("text")):
+        logger.info("Response not found via script, falling back to page_source")
+        seen = (response or {}).get("seen") or {}
+        return DuckResponse(
+            None, None, browser.page_source,
+            old_blocks=seen.get("blocks", 0), old_messages=seen.get("messages", 0),
         )
+    return DuckResponse(response.get("json"), response.get("text"), message=response.get("message"))
 
-        time.sleep(0.5)
-        
-        # Submit
-        try:
-            browser.execute_script(
-                "arguments[0].dispatchEvent(new KeyboardEvent('keydown', "
-                "{key:'Enter', code:'Enter', keyCode:13, which:13, bubbles:true, composed:true}));",
-                textarea
-            )
-        except:
-            pass
 
-        # Fallback: Button
+def _parse_html(html, *strainer_args, **strainer_kwargs):
+    """Parse only the elements matching the given SoupStrainer arguments with lxml.
+
+    BeautifulSoup is imported lazily since it is only needed for the page_source fallback.
+    Falls back to html.parser if lxml isn't installed.
+    """
+    from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+    strainer = SoupStrainer(*strainer_args, **strainer_kwargs)
+    try:
+        return BeautifulSoup(html, "lxml", parse_only=strainer)
+    except FeatureNotFound:
+        return BeautifulSoup(html, "html.parser", parse_only=strainer)
+
+
+@dataclass
+class DuckResponse:
+    """
+    A Duck.ai answer as returned by send_raw_prompt.
+
+    json, text and message hold the last JSON code block, the last response paragraph and
+    the whole last response as read from the DOM. html is only set when neither was found;
+    it is parsed once, on first access to soup, and the result is shared by all helpers
+    inspecting the response. The first old_blocks JSON blocks and old_messages responses
+    in html belong to earlier answers.
+    """
+    json: str = None
+    text: str = None
+    html: str = None
+    message: str = None
+    old_blocks: int = 0
+    old_messages: int = 0
+
+    @cached_property
+    def soup(self):
+        classes = [_JSON_BLOCK_CLASS, _MESSAGE_CLASS]
+        return _parse_html(self.html or "", attrs={"class": classes})
+
+    def full_text(self):
+        """Text of the whole last response, from the DOM or the page_source fallback."""
+        if self.message or not self.html:
+            return self.message or self.text or ""
+        messages = self.soup.find_all(*_MESSAGE_DIV)[self.old_messages:]
+        return messages[-1].get_text("\n") if messages else ""
+
+
+# Start of a JSON object: a brace followed by a key or the closing brace, so braces in prose
+# (e.g. '{9" pan}') don't open candidates
+_JSON_START_RE = re.compile(r'\{\s*["}]')
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _iter_json_objects(text):
+    """Yield (length, object) for the JSON objects in free text, in order of appearance.
+
+    Every object is decoded with raw_decode from a brace matching _JSON_START_RE, so prose
+    after it doesn't matter, and the scan goes on behind it. A broken object is skipped up
+    to the position where decoding failed, so the text is scanned once and a truncated
+    answer yields nothing.
+    """
+    pos = 0
+    while True:
+        match = _JSON_START_RE.search(text, pos)
+        if match is None:
+            return
+        start = match.start()
         try:
-            submit = browser.find_element(By.CSS_SELECTOR, "button[type='submit']")
-            browser.execute_script("arguments[0].click();", submit)
-        except:
-            pass
+            data, end = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError as e:
+            pos = max(e.pos, start + 1)
+            continue
+        yield end - start, data
+        pos = end
 
-        # Warte auf Antwort
-        time.sleep(4)
-        
-        # Warte bis Submit-Button wieder aktiv ist (Antwort fertig)
+
+def _json_from_text(text):
+    """Find a JSON object in free text: fenced code blocks first, then the largest {...}."""
+    for block in reversed(_BACKTICK_RE.findall(text)):
         try:
-            WebDriverWait(browser, 60).until(
-                lambda d: not d.find_element(By.CSS_SELECTOR, "button[type='submit']").get_attribute("disabled")
-            )
-        except:
+            return _json.loads(block)
+        except ValueError:
             pass
 
-        logger.info("Prompt sent and response retrieved successfully")
-        return browser.page_source
-
-    except Exception as e:
-        logger.error(f"Failed to send prompt: {e}", exc_info=True)
-        return None
+    best = None
+    for length, data in _iter_json_objects(text):
+        if best is None or length > best[0]:
+            best = (length, data)
+    return best[1] if best else None
 
 
 def extract_json_from_response(response):
     """
-    Extract JSON from a Duck AI HTML response.
+    Extract JSON from a Duck AI response as returned by send_raw_prompt.
     """
     if not response:
         return None
         
     try:
-        soup = BeautifulSoup(response, "html.parser")
-        code_blocks = soup.find_all("code", {"class": "language-json"})
+        if response.json:
+            try:
+                return _json.loads(response.json)
+            except ValueError:
+                logger.info("JSON block is not valid JSON, trying fallbacks")
+
+        html = response.html
+        if html:
+            # Schneller Weg: letzten JSON-Block per Regex, nur wenn der nicht passt BeautifulSoup
+            code_blocks = _JSON_CODE_RE.findall(html)[response.old_blocks:]
+            if code_blocks:
+                try:
+                    return _json.loads(unescape(code_blocks[-1]))
+                except ValueError:
+                    pass
+
+            code_blocks = response.soup.find_all(*_JSON_BLOCK)[response.old_blocks:]
+            if code_blocks:
+                json_response = code_blocks[-1].get_text()
+                try:
+                    return _json.loads(json_response)
+                except ValueError:
+                    logger.info("JSON block is not valid JSON, trying fallbacks")
+
+        # Letzter Versuch: Suche JSON-ähnliche Struktur im Text
+        data = _json_from_text(response.full_text())
+        if data is not None:
+            logger.info("Found JSON in the response text")
+            return data
+
+        logger.warning("No JSON block found in AI response after fallbacks")
         
-        if code_blocks:
-            json_response = code_blocks[-1].get_text()
-            return json.loads(json_response)
-        else:
-            logger.warning("No JSON block found in AI response after fallbacks")
-            
-            # Debug-Ausgabe
-            import time as t
-            debug_file = f"./scrapers/debug_no_json_{int(t.time())}.html"
-            with open(debug_file, "w") as f:
-                f.write(response)
-            logger.info(f"Wrote debug AI response to {debug_file}")
-            
-            # Letzter Versuch: Suche JSON-ähnliche Struktur im Text
-            logger.info("Attempting in-browser DOM traversal to find JSON candidates (shadow/iframe aware)")
-            # Hier könnte man noch weitere Parsing-Versuche machen
-            return None
+        # Debug-Ausgabe
+        if _debug_artifacts_enabled():
+            _artifact_executor.submit(
+                _write_debug_file, f"./scrapers/debug_no_json_{_artifact_tag()}.html", html or response.full_text()
+            )
+        
+        return None
             
     except Exception as e:
         logger.error(f"Failed to extract JSON: {e}", exc_info=True)
@@ -320,14 +831,23 @@ def extract_json_from_response(response):
 def send_json_prompt(browser, prompt):
     """
     Send a prompt to Duck AI and extract JSON from the response.
+
+    With DUCK_AI_CACHE_DIR set, parsed answers are cached on disk per recipe caption and
+    prompt, so re-running the same recipe doesn't ask Duck.ai again.
     """
+    cache_file, data = _lookup_cached(_get_session(browser), prompt)
+    if data is not None:
+        return data
+
     response = send_raw_prompt(browser, prompt)
     data = extract_json_from_response(response)
     if data is None:
         try:
-            _save_debug_artifacts(browser, 'no_json')
+            _save_debug_artifacts(browser, 'no_json', screenshot=False)
         except Exception:
             pass
+    else:
+        _store_cached(cache_file, data)
     return data
 
 
@@ -345,22 +865,25 @@ def get_number_of_steps(browser, caption=None):
             logger.warning("No response received from Duck.ai")
             return None
 
-        soup = BeautifulSoup(response, "html.parser")
-        last = soup.find_all("div", {"class": "VrBPSncUavA1d7C9kAc5"})
-        
-        if not last:
-            logger.warning("Couldn't find response divs")
-            return None
+        text = response.text
+        if not text and response.html:
+            last = response.soup.find_all(*_MESSAGE_DIV)[response.old_messages:]
             
-        paragraph = last[-1].find("p")
-        if not paragraph:
+            if not last:
+                logger.warning("Couldn't find response divs")
+                return None
+                
+            paragraph = last[-1].find("p")
+            if paragraph:
+                text = paragraph.get_text()
+
+        if not text:
             return None
 
-        text = paragraph.get_text().strip()
-        digits = re.findall(r"\d+", text)
+        digits = _DIGITS_RE.search(text)
         
         if digits:
-            count = int(digits[0])
+            count = int(digits.group())
             logger.info(f"Detected {count} recipe steps")
             return count
             
@@ -371,57 +894,20 @@ def get_number_of_steps(browser, caption=None):
         return None
 
 
+def _recipe_prompt(part, mode="", step_number=None):
+    """Build the prompt process_recipe_part sends for a part."""
+    if step_number is not None:
+        mode = "step"
+    template = _PROMPT_TEMPLATES.get(mode, _DEFAULT_PROMPT_TEMPLATE)
+    return template.format(lang=_LANG, part=part, step=step_number, bt=_BACKTICKS)
+
+
 def process_recipe_part(browser, part, mode="", step_number=None):
     """
     Process a part of a recipe using Duck AI and get structured data.
     """
     try:
-        backticks = chr(96) * 3
-        lang = os.getenv("LANGUAGE_CODE", "en")
-
-        if mode == "step" or step_number is not None:
-            prompt = (
-                f"Write your Response in the language {lang}. "
-                f"Please fill the JSON document {part}. "
-                f"Only step {step_number}. Return enclosed in ({backticks}json)."
-            )
-        elif mode == "info":
-            prompt = (
-                f"Write your Response in {lang}. "
-                f"Fill author, description, recipeYield, prepTime, and cookTime in {part}. "
-                f"Use ISO 8601 duration format. Return enclosed in ({backticks}json)."
-            )
-        elif mode == "ingredients":
-            prompt = (
-                f"Write your Response in {lang}. "
-                f"Append all clearly mentioned ingredients to 'recipeIngredient' in {part}. "
-                f"Return enclosed in ({backticks}json)."
-            )
-        elif mode == "name":
-            prompt = (
-                f"Respond in {lang}. "
-                f"Provide a concise title for this recipe in {part}. "
-                f"Return enclosed in ({backticks}json)."
-            )
-        elif mode == "nutrition":
-            prompt = (
-                f"Respond in {lang}. "
-                f"Fill calories and fatContent as strings in {part}. "
-                f"Return enclosed in ({backticks}json)."
-            )
-        elif mode == "instructions":
-            prompt = (
-                f"Write your Response in {lang}. "
-                f"Complete JSON fragment {part}. "
-                f"Return enclosed in ({backticks}json)."
-            )
-        else:
-            prompt = (
-                f"Write your Response in {lang}. "
-                f"Fill JSON {part}. Return enclosed in ({backticks}json)."
-            )
-
-        data = send_json_prompt(browser, prompt)
+        data = send_json_prompt(browser, _recipe_prompt(part, mode, step_number))
         
         if data:
             logger.info(f"Processed recipe part ({mode}) successfully.")
@@ -433,3 +919,210 @@ def process_recipe_part(browser, part, mode="", step_number=None):
     except Exception as e:
         logger.error(f"Error processing recipe part '{mode}': {e}", exc_info=True)
         return None
+
+
+def process_recipe_batch(browser, part, steps_count):
+    """
+    Fill a complete recipe JSON document with a single Duck AI prompt.
+
+    Args:
+        browser (WebDriver): Browser with an initialized chat.
+        part (dict): JSON document to fill. Its 'steps' list holds one step template.
+        steps_count (int): Number of steps the recipe has.
+
+    Returns:
+        dict or None: The filled document, or None if no JSON object with any of the keys
+        of part came back. It may lack some parts or steps, callers fill those with
+        process_recipe_part.
+    """
+    try:
+        prompt = _PROMPT_TEMPLATES["batch"].format(
+            lang=_LANG, part=json.dumps(part), steps=steps_count, bt=_BACKTICKS
+        )
+
+        data = send_json_prompt(browser, prompt)
+
+        if isinstance(data, dict) and any(key in data for key in part):
+            logger.info(f"Processed full recipe in one prompt ({len(data.get('steps') or [])} steps).")
+            return data
+
+        logger.warning("No valid response for batched recipe prompt.")
+        return None
+
+    except Exception as e:
+        logger.error(f"Error processing batched recipe: {e}", exc_info=True)
+        return None
+
+
+def process_parts_parallel(browsers, parts):
+    """
+    Process recipe parts spread over several browsers with initialized chats.
+
+    Every browser is driven by its own worker thread that picks the next open part once
+    it is done with its current one, so a browser never runs two prompts at once.
+
+    Args:
+        browsers (list): Browsers, each with the recipe context from initialize_chat.
+        parts (list): (part, mode, step_number) tuples as passed to process_recipe_part.
+
+    Returns:
+        list: Results in the order of parts (None for parts that failed).
+    """
+    pending = queue.SimpleQueue()
+    for index in range(len(parts)):
+        pending.put(index)
+    results = {}
+
+    def worker(browser):
+        while True:
+            try:
+                index = pending.get_nowait()
+            except queue.Empty:
+                return
+            logger.info(f"Processing recipe part {index + 1}/{len(parts)}")
+            results[index] = process_recipe_part(browser, *parts[index])
+
+    with ThreadPoolExecutor(max_workers=len(browsers)) as executor:
+        for future in [executor.submit(worker, browser) for browser in browsers]:
+            future.result()
+
+    return [results.get(index) for index in range(len(parts))]
+
+
+def open_chat_tabs(browser, caption, count):
+    """
+    Open Duck.ai chats in additional tabs of the browser and give them the recipe context.
+
+    The context prompts are submitted in all new tabs before waiting for any answer, so
+    the tabs are primed in about the time of a single prompt.
+
+    Args:
+        browser (WebDriver): Browser with an initialized chat in its current tab.
+        caption (str): Recipe caption used as context.
+        count (int): Total number of tabs (including the current one).
+
+    Returns:
+        list: Window handles of all chat tabs, the current tab first.
+    """
+    first = browser.current_window_handle
+    tabs = {first: _get_session(browser)}
+    browser._duck_tabs = tabs
+
+    submitted = []
+    for _ in range(count - 1):
+        try:
+            browser.switch_to.new_window("tab")
+            browser.get("https://duck.ai/chat")
+            handle = browser.current_window_handle
+            session = DuckChatSession(browser)
+            session.context = caption
+            if session.get_textarea(wait=15) is None or not _submit_prompt(session, _context_prompt(caption)):
+                logger.warning("No textarea found in new chat tab, closing it")
+                browser.close()
+                browser.switch_to.window(first)
+                continue
+            tabs[handle] = session
+            submitted.append(handle)
+        except Exception as e:
+            logger.warning(f"Failed to open additional chat tab: {e}")
+            # Den halb geöffneten Tab schließen, er steht nicht in den handles
+            try:
+                if browser.current_window_handle != first:
+                    browser.close()
+                browser.switch_to.window(first)
+            except Exception:
+                pass
+            break
+
+    for handle in submitted:
+        try:
+            _switch_tab(browser, handle)
+            _wait_for_response(tabs[handle])
+        except Exception as e:
+            logger.warning(f"Failed to initialize chat tab, closing it: {e}")
+            tabs.pop(handle, None)
+            try:
+                browser.close()
+            except Exception:
+                pass
+
+    _switch_tab(browser, first)
+    logger.info(f"Initialized {len(tabs) - 1} additional chat tabs")
+    return list(tabs)
+
+
+def close_chat_tabs(browser, handles):
+    """Close the tabs opened by open_chat_tabs and return to the first one."""
+    for handle in [h for h in browser.window_handles if h in handles[1:]]:
+        try:
+            browser.switch_to.window(handle)
+            browser.close()
+        except Exception as e:
+            logger.warning(f"Failed to close chat tab: {e}")
+        browser._duck_tabs.pop(handle, None)
+    _switch_tab(browser, handles[0])
+
+
+def _switch_tab(browser, handle):
+    """Switch to a chat tab and make its session the one used by send_raw_prompt."""
+    browser.switch_to.window(handle)
+    browser._duck_session = browser._duck_tabs[handle]
+
+
+def process_parts_in_tabs(browser, handles, parts):
+    """
+    Process recipe parts pipelined over the chat tabs of one browser.
+
+    A WebDriver session executes one command at a time, so instead of threads the parts are
+    handled in rounds: one prompt is submitted in every tab, then the answers are collected
+    tab by tab while the others keep generating. Cached answers (see send_json_prompt) are
+    used right away and don't take up a tab.
+
+    Args:
+        browser (WebDriver): Browser with the chat tabs from open_chat_tabs.
+        handles (list): Window handles returned by open_chat_tabs.
+        parts (list): (part, mode, step_number) tuples as passed to process_recipe_part.
+
+    Returns:
+        list: Results in the order of parts (None for parts that failed).
+    """
+    session = browser._duck_tabs[handles[0]]
+    prompts = [_recipe_prompt(*part) for part in parts]
+    results = [None] * len(parts)
+    cache_files = [None] * len(parts)
+    pending = []
+    for index, prompt in enumerate(prompts):
+        cache_files[index], results[index] = _lookup_cached(session, prompt)
+        if results[index] is None:
+            pending.append(index)
+
+    for first in range(0, len(pending), len(handles)):
+        submitted = []
+        for handle, index in zip(handles, pending[first:first + len(handles)]):
+            logger.info(f"Submitting recipe part {index + 1}/{len(parts)}")
+            try:
+                _switch_tab(browser, handle)
+                if _submit_prompt(browser._duck_session, prompts[index]):
+                    submitted.append((handle, index))
+                    continue
+            except Exception as e:
+                logger.error(f"Failed to submit recipe part {index + 1}: {e}", exc_info=True)
+            submitted.append((None, index))
+
+        for handle, index in submitted:
+            data = None
+            if handle is not None:
+                try:
+                    _switch_tab(browser, handle)
+                    data = extract_json_from_response(_read_response(browser._duck_session))
+                except Exception as e:
+                    logger.error(f"Failed to read recipe part {index + 1}: {e}", exc_info=True)
+            if data:
+                _store_cached(cache_files[index], data)
+                logger.info(f"Processed recipe part {index + 1} successfully.")
+            else:
+                logger.warning(f"No valid response for recipe part {index + 1}.")
+            results[index] = data
+
+    _switch_tab(browser, handles[0])
+    return results
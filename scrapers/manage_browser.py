@@ -1,5 +1,9 @@
+import atexit
 import os
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
@@ -7,8 +11,128 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from logs import setup_logging
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 logger = setup_logging("manage_browser")
 
+# Browser used by open_browser (see README), read once since it doesn't change at runtime
+BROWSER = os.getenv("BROWSER")
+# Optional directory for persistent Firefox profiles of the Duck.ai browsers, so repeated
+# launches start with a warm HTTP and script cache
+PROFILE_DIR = os.getenv("DUCK_AI_PROFILE_DIR")
+# Optional long-lived Selenium server (e.g. selenium/standalone-firefox) used by BROWSER=docker
+# instead of starting a geckodriver per browser
+SELENIUM_REMOTE_URL = os.getenv("SELENIUM_REMOTE_URL")
+
+# Chromium flags that skip work the headless Duck.ai chat doesn't need
+CHROMIUM_ARGUMENTS = [
+    "--headless=new",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-dev-shm-usage",
+]
+# Only used for Duck.ai, social media pages still need images for the thumbnail
+CHROMIUM_NO_IMAGES_ARGUMENT = "--blink-settings=imagesEnabled=false"
+# Firefox counterpart: no images, web fonts or autoplaying media for Duck.ai
+FIREFOX_DUCK_AI_PREFERENCES = {
+    "permissions.default.image": 2,
+    "gfx.downloadable_fonts.enabled": False,
+    "media.autoplay.default": 5,
+}
+
+# Locators of the elements open_browser and capture_thumbnail wait for
+_INSTAGRAM_OVERLAY = (By.CLASS_NAME, "xzkaem6")
+_CHAT_INPUT = (By.CSS_SELECTOR, "textarea, input[type='text']")
+_CHAT_TEXTAREA = (By.TAG_NAME, "textarea")
+_VIDEO = (By.TAG_NAME, "video")
+# Seconds to wait for the video of a post, posts with only images don't have one
+_VIDEO_TIMEOUT = 3
+
+def _wait(browser, timeout=10):
+    """WebDriverWait that polls every 100ms instead of the default 500ms."""
+    return WebDriverWait(browser, timeout, poll_frequency=0.1)
+
+def _is_duck_ai(url):
+    """open_browser without a URL opens Duck.ai."""
+    return not url or "duck.ai" in url
+
+def _page_load_options(options, url):
+    """
+    Let browser.get return at DOMContentLoaded for Duck.ai, readiness is decided by the
+    textarea wait in open_browser. Social media pages still wait for the full load.
+    """
+    if _is_duck_ai(url):
+        options.page_load_strategy = "eager"
+    return options
+
+def _claim_profile():
+    """
+    Lock the first free persistent Firefox profile in PROFILE_DIR.
+    A profile can only be used by one Firefox at a time, so every concurrently open browser
+    (in any process) gets its own slot. The lock is released by the OS if the process dies.
+
+    Returns:
+        tuple: (profile path, open lock file) or (None, None) if no profile can be used.
+    """
+    if not PROFILE_DIR:
+        return None, None
+    if fcntl is None:
+        logger.warning("Persistent browser profiles need fcntl, using a temporary profile")
+        return None, None
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    for slot in range(32):
+        path = os.path.abspath(os.path.join(PROFILE_DIR, f"firefox-{slot}"))
+        lock = open(f"{path}.lock", "w")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            continue
+        os.makedirs(path, exist_ok=True)
+        return path, lock
+
+    logger.warning("All persistent browser profiles are in use, using a temporary profile")
+    return None, None
+
+def _firefox_options(url, profile=True):
+    """
+    Firefox options, for Duck.ai without images / fonts and with a persistent profile if
+    DUCK_AI_PROFILE_DIR is set (and profile is True).
+    """
+    options = _page_load_options(webdriver.FirefoxOptions(), url)
+    lock = None
+    if _is_duck_ai(url):
+        for name, value in FIREFOX_DUCK_AI_PREFERENCES.items():
+            options.set_preference(name, value)
+    if _is_duck_ai(url) and profile:
+        path, lock = _claim_profile()
+        if path:
+            logger.info(f"Using persistent browser profile {path}")
+            options.add_argument("-profile")
+            options.add_argument(path)
+    return options, lock
+
+def _chromium_options(options, url):
+    """Add the headless tuning flags to Chrome / Edge options."""
+    for argument in CHROMIUM_ARGUMENTS:
+        options.add_argument(argument)
+    if _is_duck_ai(url):
+        options.add_argument(CHROMIUM_NO_IMAGES_ARGUMENT)
+    return _page_load_options(options, url)
+
+def _start_firefox(options, profile_lock, **kwargs):
+    """Start Firefox, releasing the profile lock if it fails to start."""
+    try:
+        return webdriver.Firefox(options=options, **kwargs)
+    except Exception:
+        if profile_lock:
+            profile_lock.close()
+        raise
+
 def open_browser(url=None, platform=None):
     """
     Opens a browser window and navigates to the specified URL.
@@ -24,40 +148,48 @@ def open_browser(url=None, platform=None):
     
     logger.info(f"Opening browser{'for '+platform if platform else ''}")
 
-    match os.getenv("BROWSER"):
+    profile_lock = None
+    match BROWSER:
         case "firefox":
-            options = webdriver.FirefoxOptions()
+            options, profile_lock = _firefox_options(url)
             options.add_argument("--headless")
-            browser = webdriver.Firefox(options=options) 
+            browser = _start_firefox(options, profile_lock)
             logger.info("Using Firefox browser")
         case "chrome":
-            options = webdriver.ChromeOptions()
-            options.add_argument("--headless")
+            options = _chromium_options(webdriver.ChromeOptions(), url)
             browser = webdriver.Chrome(options=options)
             logger.info("Using Chrome browser")
         case "edge":
-            options = webdriver.EdgeOptions()
-            options.add_argument("--headless")
+            options = _chromium_options(webdriver.EdgeOptions(), url)
             browser = webdriver.Edge(options=options)
             logger.info("Using Edge browser")
         case "safari":
-            options = webdriver.SafariOptions()
+            options = _page_load_options(webdriver.SafariOptions(), url)
             options.add_argument("--headless")
             browser = webdriver.Safari(options=options)
             logger.info("Using Safari browser")
+        case "docker" if SELENIUM_REMOTE_URL:
+            # Profiles live on the Selenium server, so no local persistent profile
+            options, profile_lock = _firefox_options(url, profile=False)
+            options.add_argument("--headless")
+            browser = webdriver.Remote(command_executor=SELENIUM_REMOTE_URL, options=options)
+            logger.info(f"Using remote Firefox browser at {SELENIUM_REMOTE_URL}")
         case "docker":
-            options = webdriver.FirefoxOptions()
+            options, profile_lock = _firefox_options(url)
             options.add_argument("--headless")
             options.add_argument("--no-sandbox")
             options.add_argument("--disable-dev-shm-usage")
             service = webdriver.firefox.service.Service(executable_path="/usr/local/bin/geckodriver")
-            browser = webdriver.Firefox(options=options, service=service)
+            browser = _start_firefox(options, profile_lock, service=service)
             logger.info("Using Firefox browser in Docker environment")
         case _:
-            options = webdriver.FirefoxOptions()
-            browser = webdriver.Firefox(options=options)
+            options, profile_lock = _firefox_options(url)
+            browser = _start_firefox(options, profile_lock)
             logger.info("Using default Firefox browser")
 
+    # Keep the profile locked while the browser is open, close_browser releases it
+    browser._duck_profile_lock = profile_lock
+
     # Navigate to specified URL or Duck.ai
     target_url = url if url else "https://duck.ai/"
     logger.info(f"Navigating to {target_url}")
@@ -67,37 +199,29 @@ def open_browser(url=None, platform=None):
     if platform == "instagram" or platform == "i":
         try:
             logger.info("Waiting for Instagram overlay element to appear")
-            WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "xzkaem6"))
-            )
-            div = browser.find_element(By.CLASS_NAME, "xzkaem6")
+            div = _wait(browser).until(EC.presence_of_element_located(_INSTAGRAM_OVERLAY))
             browser.execute_script("arguments[0].style.visibility='hidden'", div)
             logger.info("Successfully hidden Instagram overlay")
         except Exception as e:
             logger.info(f"Failed to hide Instagram overlay: {e}")
     
     # If Duck.ai, handle welcome screens
-    elif not url or "duck.ai" in target_url:
+    elif _is_duck_ai(url):
         logger.info("Navigating directly to Duck.ai chat page")
         
         try:
             # Direkt zur Chat-Seite navigieren (überspringt Welcome-Screen)
             browser.get('https://duck.ai/chat')
-            time.sleep(3)  # Warte auf vollständiges Laden
             
-            # Prüfe ob Chat-Interface geladen ist
-            chat_input = WebDriverWait(browser, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "textarea, input[type='text']"))
-            )
+            # Prüfe ob Chat-Interface geladen ist (statt fester Wartezeit)
+            chat_input = _wait(browser, 15).until(EC.presence_of_element_located(_CHAT_INPUT))
             logger.info("Chat interface loaded successfully")
             
         except TimeoutException:
             logger.warning("Chat interface not found - trying alternative selectors")
             try:
                 # Alternative: Suche nach beliebigem Input-Feld
-                chat_input = WebDriverWait(browser, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "textarea"))
-                )
+                chat_input = _wait(browser).until(EC.presence_of_element_located(_CHAT_TEXTAREA))
                 logger.info("Chat interface loaded via alternative selector")
             except TimeoutException:
                 logger.error("Failed to load Duck.ai chat interface")
@@ -107,9 +231,6 @@ def open_browser(url=None, platform=None):
             logger.error(f"Error accessing Duck.ai: {str(e)}")
             raise Exception("Failed to open browser")
     
-    # General wait for content to load
-    time.sleep(0.5)
-    
     logger.info("Browser initialized successfully")
     return browser
         
@@ -126,6 +247,199 @@ def close_browser(browser):
             browser.quit()
         except Exception as e:
             logger.error(f"Error closing browser: {e}")
+        profile_lock = getattr(browser, "_duck_profile_lock", None)
+        if profile_lock:
+            profile_lock.close()
+
+# All browser pools of this process, closed together on exit
+_pools = []
+# Browsers are reset / closed in the background, so the caller doesn't wait for it
+_release_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="browser_release")
+# Duck.ai browsers are opened in the background while the social media post is scraped
+_open_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="browser_open")
+# Seconds a checkout waits for a browser that is still being checked in
+_PENDING_CHECKIN_TIMEOUT = 30
+
+class BrowserPool:
+    """
+    Thread-safe pool of Duck.ai browsers that are reused across recipes.
+
+    Browsers are opened lazily on checkout, up to maxsize at a time. With warm, the first
+    checkout also starts opening the remaining browsers in the background. A checked in
+    browser navigates to a fresh Duck.ai chat, so the next user doesn't see the previous
+    recipe. All idle browsers are closed when the interpreter exits.
+    """
+
+    def __init__(self, maxsize, warm=False):
+        self.maxsize = maxsize
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._warm = warm
+        self._closed = False
+        self._pending = 0
+        _pools.append(self)
+
+    def checkout(self, timeout=None):
+        """
+        Take an idle browser or open a new one if the pool isn't full yet.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a browser if all are in use. By
+                default only browsers that are still being checked in are waited for (up to
+                _PENDING_CHECKIN_TIMEOUT seconds).
+
+        Returns:
+            WebDriver: A browser on the Duck.ai chat page.
+
+        Raises:
+            queue.Empty: If no browser became available within the timeout.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        if not self._reserve():
+            if timeout is None:
+                timeout = _PENDING_CHECKIN_TIMEOUT if self._pending else 0
+            return self._idle.get(timeout=timeout)
+
+        try:
+            browser = open_browser()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+        if self._warm:
+            self._warm = False
+            threading.Thread(target=self._fill, daemon=True).start()
+        return browser
+
+    def _reserve(self):
+        """Count a new browser against maxsize, False if the pool is full."""
+        with self._lock:
+            if self._closed or self._created >= self.maxsize:
+                return False
+            self._created += 1
+            return True
+
+    def _fill(self):
+        """Open browsers until the pool is full (runs on a background thread)."""
+        while self._reserve():
+            try:
+                browser = open_browser()
+            except Exception as e:
+                logger.warning(f"Failed to warm up pooled browser: {e}")
+                with self._lock:
+                    self._created -= 1
+                return
+            if self._closed:
+                self.discard(browser)
+                return
+            self._idle.put(browser)
+
+    def checkin(self, browser):
+        """
+        Return a browser to the pool, or close it if it can't open a new chat.
+        Cookies and web storage of the last recipe chat are cleared, so it isn't shown again,
+        and tabs left open by the recipe are closed.
+        """
+        try:
+            for handle in browser.window_handles[1:]:
+                browser.switch_to.window(handle)
+                browser.close()
+            browser.switch_to.window(browser.window_handles[0])
+            browser.delete_all_cookies()
+            browser.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            browser.get("https://duck.ai/chat")
+        except Exception as e:
+            logger.warning(f"Failed to reset pooled browser, closing it: {e}")
+            self.discard(browser)
+            return
+        self._idle.put(browser)
+
+    def checkin_later(self, browser):
+        """Like checkin, but the browser is reset on a background thread."""
+        with self._lock:
+            self._pending += 1
+
+        def _checkin():
+            try:
+                self.checkin(browser)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+
+        _release_executor.submit(_checkin)
+
+    def discard(self, browser):
+        """Close a checked out browser instead of returning it to the pool."""
+        close_browser(browser)
+        with self._lock:
+            self._created -= 1
+
+    def close(self):
+        """Close all idle browsers."""
+        self._closed = True
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self.discard(browser)
+
+def close_browser_pools():
+    """Close the idle browsers of all pools, e.g. when a worker process exits."""
+    _open_executor.shutdown(wait=True)
+    _release_executor.shutdown(wait=True)
+    for pool in _pools:
+        pool.close()
+
+atexit.register(close_browser_pools)
+
+# Warm Duck.ai browsers for the recipe chats, shared by the Mealie and Tandoor scrapers
+CHAT_BROWSERS = max(1, int(os.getenv("DUCK_AI_POOL", "1")))
+_chat_browsers = BrowserPool(CHAT_BROWSERS, warm=True)
+
+def open_chat_browser():
+    """
+    Take a Duck.ai browser for a recipe chat from the pool.
+    If all pooled browsers are in use, an additional browser is opened just for this recipe.
+
+    Returns:
+        WebDriver: A browser on the Duck.ai chat page, to be returned with release_chat_browser.
+    """
+    try:
+        browser = _chat_browsers.checkout()
+    except queue.Empty:
+        logger.info("All pooled Duck.ai browsers are in use, opening an additional one")
+        return open_browser()
+    browser._duck_pooled = True
+    return browser
+
+def open_chat_browser_later():
+    """Run open_chat_browser on a background thread and return a Future of the browser."""
+    return _open_executor.submit(open_chat_browser)
+
+def cancel_chat_browser(future):
+    """Release the browser of open_chat_browser_later once it is open, it isn't needed after all."""
+    if future.cancel():
+        return
+    future.add_done_callback(
+        lambda f: release_chat_browser(f.result()) if f.exception() is None else None
+    )
+
+def release_chat_browser(browser):
+    """
+    Return a browser from open_chat_browser to the pool, or close it if it wasn't pooled.
+    Both happen in the background, so the recipe result isn't delayed by it.
+    """
+    if getattr(browser, "_duck_pooled", False):
+        _chat_browsers.checkin_later(browser)
+    else:
+        _release_executor.submit(close_browser, browser)
 
 def capture_thumbnail(browser):
     """
@@ -137,23 +451,19 @@ def capture_thumbnail(browser):
     Returns:
         str or None: Path to the thumbnail file if successful, otherwise None.
     """
-    if os.getenv("BROWSER") != "docker":
+    if BROWSER != "docker":
         try:
             logger.info("Attempting to capture video thumbnail")
             # Create thumbnails directory if it doesn't exist
             os.makedirs('thumbnails', exist_ok=True)
             
             # Generate a unique filename
-            thumbnail_filename = f"thumbnails/thumbnail_{int(time.time())}.png"
+            # The pid keeps parallel worker processes from overwriting each other's thumbnails
+            thumbnail_filename = f"thumbnails/thumbnail_{int(time.time())}_{os.getpid()}.png"
             
-            # Wait for video element to be present
+            # Wait for video element to be present (the first check is immediate)
             logger.info("Waiting for video element")
-            WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "video"))
-            )
-            
-            # Find the video element
-            video = browser.find_element(By.TAG_NAME, "video")
+            video = _wait(browser, _VIDEO_TIMEOUT).until(EC.presence_of_element_located(_VIDEO))
             
             # Take screenshot of the video element
             video.screenshot(thumbnail_filename)
@@ -1,14 +1,71 @@
 import json
+import os
 from datetime import datetime
 
 from logs import setup_logging
-from scrapers.ai_service import initialize_chat, process_recipe_part, send_json_prompt
+from scrapers.ai_service import (
+    _dumps,
+    close_chat_tabs,
+    initialize_chat,
+    open_chat_tabs,
+    process_parts_in_tabs,
+    process_recipe_part,
+    save_debug_json,
+    send_json_prompt,
+)
 from scrapers.api_service import send_recipe
-from scrapers.manage_browser import open_browser, close_browser
+from scrapers.manage_browser import cancel_chat_browser, open_chat_browser_later, release_chat_browser
 from scrapers.social_scraper import get_caption_from_post
 
 logger = setup_logging("scrape_for_mealie")
 
+# Number of Duck.ai chat tabs used to pipeline the missing recipe parts
+STEP_TABS = max(1, int(os.getenv("DUCK_AI_TABS", "1")))
+
+# Templates of the recipe parts, only read (the AI answers are merged into a new dict)
+_JSON_PARTS = (
+    {
+        "@context": "https://schema.org",
+        "@type": "Recipe",
+        "author": "string",
+        "cookTime": "PT1H",
+        "prepTime": "PT15M",
+        "datePublished": "string",
+        "description": "",
+        "image": None,
+        "recipeYield": "",
+    },
+    {
+        "recipeIngredient": [
+            "string",
+        ],
+    },
+    {
+        "interactionStatistic": 
+            {
+                "@type": "InteractionCounter",
+                "interactionType": "https://schema.org/Comment",
+                "userInteractionCount": "140"
+            },
+    },
+    {
+        "name": "",
+    },
+    {
+        "nutrition": {
+            "@type": "NutritionInformation",
+            "calories": "string",
+            "fatContent": "string"
+        },
+    },
+    {
+        "suitableForDiet": None
+    },
+    {
+        "recipeInstructions": "string",
+    }
+)
+
 def scrape_recipe_for_mealie(url, platform):
     """
     Function to process a social media post URL and extract recipe information.
@@ -25,17 +82,23 @@ def scrape_recipe_for_mealie(url, platform):
         Exception: If processing fails.
     """
     
-    result = get_caption_from_post(url, platform)
+    # Open the single browser instance used for all Duck.ai interactions while the post is scraped
+    browser_future = open_chat_browser_later()
+    try:
+        result = get_caption_from_post(url, platform)
+    except Exception:
+        cancel_chat_browser(browser_future)
+        raise
     
     if result is None:
+        cancel_chat_browser(browser_future)
         logger.error("No caption or image found")
         raise Exception("No caption or image found")
     
     caption, thumbnail_filename = result
     logger.info(f"Caption extracted successfully ({len(caption)} chars)")
     
-    # Open a single browser instance that will be used for all Duck.ai interactions
-    browser = open_browser()
+    browser = browser_future.result()
     if not browser:
         logger.error("Failed to open browser")
         raise Exception("Failed to open browser")
@@ -47,9 +110,10 @@ def scrape_recipe_for_mealie(url, platform):
             raise Exception("Failed to initialize chat with recipe context")
         
         # First attempt: ask AI once for the full recipe JSON-LD (single-shot)
+        # The caption is already the context of the chat, so it isn't sent again
         logger.info("Attempting single-shot full recipe extraction from AI")
         single_prompt = (
-            f"Write the full recipe as a JSON-LD object following schema.org/Recipe using the following post as context:\n{caption}\n"
+            "Write the full recipe as a JSON-LD object following schema.org/Recipe using the recipe post from the context.\n"
             "Return EXACTLY one JSON code block (```json ... ```) and nothing else. The object must include at least these keys: '@context', '@type' (Recipe), 'name', 'recipeIngredient', 'recipeInstructions', 'datePublished'. Use ISO-8601 durations for times where applicable."
         )
         try:
@@ -57,107 +121,57 @@ def scrape_recipe_for_mealie(url, platform):
         except Exception:
             single_res = None
 
-        if single_res:
+        if isinstance(single_res, dict) and single_res.get("@type") == "Recipe":
             full_json = single_res
             logger.info("Single-shot extraction succeeded")
         else:
             # Fallback: multi-step extraction (existing behavior)
-            json_parts = [
-                {
-                    "@context": "https://schema.org",
-                    "@type": "Recipe",
-                    "author": "string",
-                    "cookTime": "PT1H",
-                    "prepTime": "PT15M",
-                    "datePublished": "string",
-                    "description": "",
-                    "image": None,
-                    "recipeYield": "",
-                },
-                {
-                    "recipeIngredient": [
-                        "string",
-                    ],
-                },
-                {
-                    "interactionStatistic": 
-                        {
-                            "@type": "InteractionCounter",
-                            "interactionType": "https://schema.org/Comment",
-                            "userInteractionCount": "140"
-                        },
-                },
-                {
-                    "name": "",
-                },
-                {
-                    "nutrition": {
-                        "@type": "NutritionInformation",
-                        "calories": "string",
-                        "fatContent": "string"
-                    },
-                },
-                {
-                    "suitableForDiet": None
-                },
-                {
-                    "recipeInstructions": "string",
-                }
-            ]
-
             # Build the recipe JSON structure
             full_json = {}
 
-            # Get recipe instructions
-            logger.info("Getting recipe instructions")
-            instructions_res = process_recipe_part(browser, json_parts[6], "instructions")
-            if instructions_res:
-                full_json.update(instructions_res)
-                logger.info("Recipe instructions processed successfully")
-            else:
-                logger.warning("Failed to get recipe instructions")
-
-            # Get recipe general information
-            logger.info("Getting recipe information")
-            info_res = process_recipe_part(browser, json_parts[0], "info")
-            if info_res:
-                full_json.update(info_res)
-                logger.info("Recipe information processed successfully")
-            else:
-                logger.warning("Failed to get recipe information")
-
-            # Get recipe ingredients
-            logger.info("Getting recipe ingredients")
-            ingredients_res = process_recipe_part(browser, json_parts[1], "ingredients")
-            if ingredients_res:
-                full_json.update(ingredients_res)
-                logger.info("Recipe ingredients processed successfully")
+            # Ask for all recipe fields at once, single parts are only requested again if missing
+            logger.info("Getting all recipe parts in one prompt")
+            all_res = process_recipe_part(
+                browser,
+                {**_JSON_PARTS[0], **_JSON_PARTS[1], **_JSON_PARTS[3], **_JSON_PARTS[4], **_JSON_PARTS[6]},
+                "all",
+            )
+            if isinstance(all_res, dict):
+                full_json.update(all_res)
+                logger.info("Recipe parts processed successfully in one prompt")
             else:
-                logger.warning("Failed to get recipe ingredients")
+                logger.warning("Failed to get all recipe parts in one prompt")
 
-            # Add interaction statistics
-            full_json.update(json_parts[2])
+            # Same rule as for Tandoor: a part is only missing if none of its keys came back
+            # (the info part also holds keys like '@context' or 'image' that are often left out)
+            def _missing(part):
+                return all(key not in full_json for key in part)
 
-            # Get recipe name
-            logger.info("Getting recipe name")
-            name_res = process_recipe_part(browser, json_parts[3], "name")
-            if name_res:
-                full_json.update(name_res)
-                logger.info(f"Recipe name: {name_res.get('name', 'Unknown')}")
-            else:
-                logger.warning("Failed to get recipe name")
-
-            # Get nutrition information
-            logger.info("Getting nutrition information")
-            nutrition_res = process_recipe_part(browser, json_parts[4], "nutrition")
-            if nutrition_res:
-                full_json.update(nutrition_res)
-                logger.info("Nutrition information processed successfully")
-            else:
-                logger.warning("Failed to get nutrition information")
+            # Single parts are only requested again if missing, they don't depend on each other
+            missing = {
+                mode: part
+                for mode, part in (
+                    ("instructions", _JSON_PARTS[6]),
+                    ("info", _JSON_PARTS[0]),
+                    ("ingredients", _JSON_PARTS[1]),
+                    ("name", _JSON_PARTS[3]),
+                    ("nutrition", _JSON_PARTS[4]),
+                )
+                if _missing(part)
+            }
+            if missing:
+                logger.info(f"Requesting missing recipe parts: {', '.join(missing)}")
+                parts = [(part, mode) for mode, part in missing.items()]
+                for mode, res in zip(missing, _process_parts(browser, parts, caption)):
+                    if res:
+                        full_json.update(res)
+                        logger.info(f"Recipe {mode} processed successfully")
+                    else:
+                        logger.warning(f"Failed to get recipe {mode}")
 
-            # Add diet suitability
-            full_json.update(json_parts[5])
+            # Add interaction statistics and diet suitability
+            full_json.update(_JSON_PARTS[2])
+            full_json.update(_JSON_PARTS[5])
 
             # Add current date
             full_json["datePublished"] = datetime.now().strftime("%Y-%m-%d")
@@ -199,7 +213,7 @@ def scrape_recipe_for_mealie(url, platform):
             }
 
         # Format as JSON-LD script
-        json_ld_script = f'<script type="application/ld+json">{json.dumps(full_json)}</script>'
+        json_ld_script = f'<script type="application/ld+json">{_dumps(full_json)}</script>'
 
         # Create final JSON structure for Mealie API
         final_json = {
@@ -207,9 +221,8 @@ def scrape_recipe_for_mealie(url, platform):
             "data": json_ld_script
         }
                         
-        logger.info("Saving final JSON")
-        with open('./scrapers/final_json.json', 'w') as outfile:
-            json.dump(final_json, outfile, indent=2)
+        # Save the final JSON (only when debugging)
+        save_debug_json('./scrapers/final_json.json', final_json)
         
         # Send to Mealie
         logger.info("Sending to Mealie API")
@@ -226,5 +239,29 @@ def scrape_recipe_for_mealie(url, platform):
         raise
     
     finally:
-        # Always close the browser
-        close_browser(browser)
\ No newline at end of file
+        # Always return the browser to the pool (or close it)
+        release_chat_browser(browser)
+
+
+def _process_parts(browser, parts, caption):
+    """
+    Get every missing recipe part with its own prompt.
+
+    With DUCK_AI_TABS > 1 additional chat tabs are opened in the same browser and the
+    parts are pipelined over them, otherwise they are requested one after another.
+    """
+    if STEP_TABS > 1 and len(parts) > 1:
+        tabs = []
+        try:
+            tabs = open_chat_tabs(browser, caption, min(STEP_TABS, len(parts)))
+        except Exception as e:
+            logger.warning(f"Failed to open additional chat tabs: {e}")
+
+        if len(tabs) > 1:
+            try:
+                logger.info(f"Processing {len(parts)} recipe parts in {len(tabs)} chat tabs")
+                return process_parts_in_tabs(browser, tabs, parts)
+            finally:
+                close_chat_tabs(browser, tabs)
+
+    return [process_recipe_part(browser, *part) for part in parts]
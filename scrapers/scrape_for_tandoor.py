@@ -1,13 +1,37 @@
-import json
+import os
+import queue
 
 from logs import setup_logging
-from scrapers.ai_service import get_number_of_steps, initialize_chat, process_recipe_part
+from scrapers.ai_service import (
+    close_chat_tabs,
+    get_number_of_steps,
+    initialize_chat,
+    open_chat_tabs,
+    process_recipe_batch,
+    process_recipe_part,
+    process_parts_in_tabs,
+    process_parts_parallel,
+    save_debug_json,
+)
 from scrapers.api_service import send_recipe
-from scrapers.manage_browser import close_browser, open_browser
+from scrapers.manage_browser import (
+    BrowserPool,
+    cancel_chat_browser,
+    open_chat_browser_later,
+    release_chat_browser,
+)
 from scrapers.social_scraper import get_caption_from_post
 
 logger = setup_logging("scrape_for_tandoor")
 
+# Number of Duck.ai chats (browsers) used to process recipe parts in parallel
+STEP_BROWSERS = max(1, int(os.getenv("DUCK_AI_BROWSERS", "1")))
+# Number of Duck.ai chat tabs per browser used to pipeline recipe parts
+STEP_TABS = max(1, int(os.getenv("DUCK_AI_TABS", "1")))
+
+# Additional browsers for parallel recipe parts, kept open between recipes
+_step_browsers = BrowserPool(STEP_BROWSERS - 1)
+
 def scrape_recipe_for_tandoor(url, platform):
     """
     Process an Instagram or TikTok post URL and extract recipe information.
@@ -24,17 +48,23 @@ def scrape_recipe_for_tandoor(url, platform):
         Exception: If processing fails.
     """
     
-    result = get_caption_from_post(url, platform)
+    # Open the single browser instance used for all Duck.ai interactions while the post is scraped
+    browser_future = open_chat_browser_later()
+    try:
+        result = get_caption_from_post(url, platform)
+    except Exception:
+        cancel_chat_browser(browser_future)
+        raise
     
     if result is None:
+        cancel_chat_browser(browser_future)
         logger.error("No caption or image found")
         raise Exception("No caption or image found")
     
     caption, thumbnail_filename = result
     logger.info(f"Caption extracted successfully ({len(caption)} chars)")
     
-    # Open a single browser instance that will be used for all Duck.ai interactions
-    browser = open_browser()
+    browser = browser_future.result()
     if not browser:
         logger.error("Failed to open browser")
         raise Exception("Failed to open browser")
@@ -105,24 +135,86 @@ def scrape_recipe_for_tandoor(url, platform):
             } 
         ]
         
-        # Build the recipe JSON structure
-        full_json = {}
+        # First attempt: fill the whole recipe with a single prompt
+        logger.info("Attempting batched full recipe extraction from AI")
+        batch_part = {**json_parts[0], "steps": [json_parts[1]], **json_parts[2], **json_parts[3]}
+        full_json = process_recipe_batch(browser, batch_part, number_of_steps)
+        
+        # Fallback: one prompt per recipe part the batched prompt didn't return
+        full_json = _process_recipe_parts(browser, json_parts, number_of_steps, caption, full_json)
+        
+        # Add source URL
+        full_json["source_url"] = url
+        
+        # Fix ingredient header flags
+        for step in full_json.get("steps", []):
+            for ingredient in step.get("ingredients", []):
+                ingredient["is_header"] = False
+        
+        # Save the final JSON (only when debugging)
+        save_debug_json('./scrapers/final_json.json', full_json)
         
-        # Get recipe name and description
-        logger.info("Getting recipe name and description")
-        name_res = process_recipe_part(browser, json_parts[0])
+        # Send to Tandoor
+        logger.info("Sending to Tandoor API")
+        tandoor_result = send_recipe("TANDOOR", full_json, thumbnail_filename)
+
+        return tandoor_result
+        
+    except Exception as e:
+        logger.error(f"Error processing recipe: {e}", exc_info=True)
+        raise
+    
+    finally:
+        # Always return the browser to the pool (or close it)
+        release_chat_browser(browser)
+
+
+def _process_recipe_parts(browser, json_parts, number_of_steps, caption, full_json=None):
+    """
+    Fill the recipe JSON with one Duck.ai prompt per part (and per step).
+    Only the parts missing in full_json (the result of the batched prompt) are requested.
+    """
+    # Build the recipe JSON structure
+    full_json = dict(full_json or {})
+    
+    def _missing(part):
+        return all(key not in full_json for key in part)
+    
+    # All prompts are independent of each other, so they can run in parallel chats
+    parts = {}
+    if _missing(json_parts[0]):
+        parts["name"] = (json_parts[0], "", None)
+    # Only the steps the batched prompt didn't return are requested
+    steps = full_json.get("steps") if isinstance(full_json.get("steps"), list) else []
+    step_numbers = range(len(steps) + 1, number_of_steps + 1)
+    for i in step_numbers:
+        parts[f"step {i}"] = (json_parts[1], "step", i)
+    if _missing(json_parts[2]):
+        parts["servings"] = (json_parts[2], "", None)
+    if _missing(json_parts[3]):
+        parts["nutrition"] = (json_parts[3], "", None)
+    
+    if not parts:
+        logger.info("Batched extraction succeeded")
+        return full_json
+    
+    logger.info(f"Requesting missing recipe parts: {', '.join(parts)}")
+    results = dict(zip(parts, _process_parts(browser, list(parts.values()), caption)))
+    
+    # Get recipe name and description
+    if "name" in results:
+        name_res = results["name"]
         if name_res:
             full_json.update(name_res)
             logger.info(f"Recipe name: {name_res.get('name', 'Unknown')}")
         else:
             logger.warning("Failed to get recipe name and description")
-        
-        # Get recipe steps and ingredients
-        logger.info("Getting recipe steps and ingredients")
-        steps = {"steps": []}
-        for i in range(1, number_of_steps + 1):
-            logger.info(f"Processing step {i}/{number_of_steps}")
-            instruction_res = process_recipe_part(browser, json_parts[1], True, i)
+    
+    # Get recipe steps and ingredients
+    if step_numbers:
+        steps = {"steps": list(steps)}
+        for i in step_numbers:
+            instruction_res = results[f"step {i}"]
             if instruction_res:
                 steps["steps"].append(instruction_res)
                 logger.info(f"Step {i} processed successfully")
@@ -130,48 +222,75 @@ def scrape_recipe_for_tandoor(url, platform):
                 logger.warning(f"Failed to process step {i}")
         
         full_json.update(steps)
-        
-        # Get serving information
-        logger.info("Getting serving information")
-        servings_res = process_recipe_part(browser, json_parts[2])
+    
+    # Get serving information
+    if "servings" in results:
+        servings_res = results["servings"]
         if servings_res:
             full_json.update(servings_res)
             logger.info(f"Servings: {servings_res.get('servings', 'Unknown')}")
         else:
             logger.warning("Failed to get serving information")
-        
-        # Get nutrition and timing information
-        logger.info("Getting nutrition and timing information")
-        nutrition_res = process_recipe_part(browser, json_parts[3])
+    
+    # Get nutrition and timing information
+    if "nutrition" in results:
+        nutrition_res = results["nutrition"]
         if nutrition_res:
             full_json.update(nutrition_res)
             logger.info("Nutrition and timing information processed successfully")
         else:
             logger.warning("Failed to get nutrition and timing information")
-        
-        # Add source URL
-        full_json["source_url"] = url
-        
-        # Fix ingredient header flags
-        for step in full_json.get("steps", []):
-            for ingredient in step.get("ingredients", []):
-                ingredient["is_header"] = False
-        
-        # Save the final JSON
-        logger.info("Saving final JSON")
-        with open('./scrapers/final_json.json', 'w') as outfile:
-            json.dump(full_json, outfile, indent=2)
-        
-        # Send to Tandoor
-        logger.info("Sending to Tandoor API")
-        tandoor_result = send_recipe("TANDOOR", full_json, thumbnail_filename)
-
-        return tandoor_result
-        
-    except Exception as e:
-        logger.error(f"Error processing recipe: {e}", exc_info=True)
-        raise
     
+    return full_json
+
+
+def _process_parts(browser, parts, caption):
+    """
+    Get every recipe part with its own prompt.
+
+    With DUCK_AI_BROWSERS > 1 additional browsers are taken from a pool and primed with
+    the caption, so the parts are processed in parallel chats. Otherwise DUCK_AI_TABS > 1
+    opens additional chat tabs in the same browser and pipelines the parts over them.
+    """
+    browsers = [browser]
+    try:
+        try:
+            for _ in range(min(STEP_BROWSERS, len(parts)) - 1):
+                extra = _step_browsers.checkout(timeout=0)
+                if initialize_chat(extra, caption):
+                    browsers.append(extra)
+                else:
+                    logger.warning("Failed to initialize additional chat, not using it for recipe parts")
+                    _step_browsers.discard(extra)
+        except queue.Empty:
+            logger.info(f"All additional Duck.ai browsers are in use, using {len(browsers)} chats for recipe parts")
+        except Exception as e:
+            logger.warning(f"Failed to open additional chat: {e}")
+
+        if len(browsers) == 1 and STEP_TABS > 1:
+            tabs = []
+            try:
+                tabs = open_chat_tabs(browser, caption, min(STEP_TABS, len(parts)))
+            except Exception as e:
+                logger.warning(f"Failed to open additional chat tabs: {e}")
+
+            if len(tabs) > 1:
+                try:
+                    logger.info(f"Processing {len(parts)} recipe parts in {len(tabs)} chat tabs")
+                    return process_parts_in_tabs(browser, tabs, parts)
+                finally:
+                    close_chat_tabs(browser, tabs)
+
+        if len(browsers) == 1:
+            results = []
+            for i, part in enumerate(parts, start=1):
+                logger.info(f"Processing recipe part {i}/{len(parts)}")
+                results.append(process_recipe_part(browser, *part))
+            return results
+
+        logger.info(f"Processing {len(parts)} recipe parts in {len(browsers)} parallel chats")
+        return process_parts_parallel(browsers, parts)
+
     finally:
-        # Always close the browser
-        close_browser(browser)
\ No newline at end of file
+        for extra in browsers[1:]:
+            _step_browsers.checkin_later(extra)